@@ -0,0 +1,304 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import contextlib
+import statistics
+import tracemalloc
+import urllib.parse
+import urllib.request
+from typing import List, Tuple
+
+from rich.console import Console
+from rich.table import Table
+
+TARGETS = ["main", "main_pydantic", "main_pydantic_moe"]
+
+
+def configure_env(base_url: str, work_dir: str) -> None:
+    """Points every entry point at the mock; set before importing them, as dotenv doesn't override existing vars."""
+    os.environ["LLM_BASE_URL"] = base_url
+    os.environ["LLM_MODEL"] = "mock"
+    os.environ["LLM_MODELS"] = "mock"
+    os.environ["OPENAI_API_KEY"] = "sk-mock"
+    # caching would hide the framework overhead we are measuring
+    os.environ["RESPONSE_CACHE_PATH"] = os.path.join(work_dir, "response_cache.sqlite")
+    os.environ["RESPONSE_CACHE_MAX_TEMPERATURE"] = "-1"
+    # fixture notes instead of the user's ones, forwarded to MCP servers by the entry points
+    os.environ["NOTES_PATH"] = work_dir
+    # MCP servers log every request at INFO to stderr, which buries the report
+    os.environ["FASTMCP_LOG_LEVEL"] = "WARNING"
+    with open(os.path.join(work_dir, "0a context.md"), "w") as file:
+        file.write("# 0a context\nbenchmark fixture note\n")
+
+
+async def start_mock_process(args) -> Tuple[asyncio.subprocess.Process, str]:
+    """
+    Starts bench_mock_llm.py in its own process, so its request handling doesn't compete for the GIL
+    with the agent loops being measured. Returns the process and the mock root url.
+    """
+    command = [
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_mock_llm.py"),
+        "--port", "0",
+        "--latency", str(args.latency),
+        "--chunk-latency", str(args.chunk_latency),
+    ]
+    if args.script:
+        command += ["--script", args.script]
+    process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE)
+    line = (await process.stdout.readline()).decode("utf-8").strip()
+    if "http://" not in line:
+        process.kill()
+        raise RuntimeError(f"Mock LLM failed to start: {line}")
+    return process, line[line.index("http://"):].removesuffix("/v1")
+
+
+async def mock_requests_for(mock_url: str, tag: str) -> List[tuple]:
+    """Returns (started_at, finished_at) time.time() pairs of the mock requests made for the given tag."""
+
+    def fetch():
+        with urllib.request.urlopen(f"{mock_url}/stats?tag={urllib.parse.quote(tag)}") as response:
+            return json.load(response)["requests"]
+
+    return await asyncio.to_thread(fetch)
+
+
+def max_rss_mib() -> float:
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB on Linux
+    return max_rss / 1024 / 1024 if sys.platform == "darwin" else max_rss / 1024
+
+
+@contextlib.asynccontextmanager
+async def drive_main(streaming: bool):
+    """LangGraph agent from main.py, one checkpointer thread per session."""
+    import main
+
+    model_router, agent_executors = await main.build_agent(streaming=streaming)
+
+    with open(os.devnull, "w") as devnull:
+        console = Console(file=devnull)
+
+        async def run_turn(session_id: str, message: str) -> str:
+            config = {"configurable": {"thread_id": session_id}, "recursion_limit": 42}
+            return await main.run_turn(model_router, agent_executors, message, config, console)
+
+        yield run_turn
+
+
+@contextlib.asynccontextmanager
+async def drive_pydantic(streaming: bool):
+    """Pydantic-AI agent from main_pydantic.py, message history kept per session."""
+    from main_pydantic import build_agent
+
+    agent = await build_agent()
+    histories = {}
+
+    async def run_turn(session_id: str, message: str) -> str:
+        history = histories.get(session_id, [])
+        if streaming:
+            async with agent.run_stream(message, message_history=history) as result:
+                output = await result.get_output()
+        else:
+            result = await agent.run(message, message_history=history)
+            output = result.output
+        histories[session_id] = result.all_messages()
+        return str(output)
+
+    async with agent.run_mcp_servers():
+        yield run_turn
+
+
+@contextlib.asynccontextmanager
+async def drive_moe(streaming: bool):
+    """Facilitator from main_pydantic_moe.py, message history kept per session. Experts are never streamed."""
+    import main_pydantic_moe as moe
+
+    histories = {}
+
+    async def run_turn(session_id: str, message: str) -> str:
+        history = histories.get(session_id, [])
+        if streaming:
+            async with moe.orchestrator_agent.run_stream(message, message_history=history) as result:
+                output = await result.get_output()
+        else:
+            tier = moe.model_router.route(message, "facilitator")
+            result, _ = await moe.run_routed(moe.orchestrator_agent, message, tier, message_history=history)
+            output = result.output
+        histories[session_id] = result.all_messages()
+        return str(output)
+
+    async with moe.analyst_agent.run_mcp_servers():
+        yield run_turn
+
+
+DRIVERS = {"main": drive_main, "main_pydantic": drive_pydantic, "main_pydantic_moe": drive_moe}
+
+
+async def timed_turn(mock_url: str, run_turn, session_id: str, tag: str) -> dict:
+    """
+    Runs one turn and splits its wall time into model time (spent inside the mock) and framework overhead.
+    Step gaps are the times between consecutive model requests: tool calls, MCP round trips and agent loop dispatch.
+    """
+    # wall clock, to be comparable with the mock process timestamps
+    started_at = time.time()
+    await run_turn(session_id, f"[bench:{tag}] read my context note and tell me what matters today")
+    finished_at = time.time()
+
+    requests = sorted(await mock_requests_for(mock_url, tag))
+    model_seconds = sum(end - start for start, end in requests)
+    step_gaps = [requests[i + 1][0] - requests[i][1] for i in range(len(requests) - 1)]
+    if requests:
+        step_gaps = [requests[0][0] - started_at, *step_gaps, finished_at - requests[-1][1]]
+    return {
+        "wall": finished_at - started_at,
+        "overhead": finished_at - started_at - model_seconds,
+        "steps": len(requests),
+        "step_gaps": step_gaps,
+    }
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def run_level(mock_url: str, run_turn, target: str, concurrency: int, turns: int) -> dict:
+    """Runs `concurrency` conversations of `turns` turns each at the same time."""
+
+    async def session(session_index: int) -> List[dict]:
+        session_id = f"{target}-c{concurrency}-s{session_index}"
+        return [await timed_turn(mock_url, run_turn, session_id, f"{session_id}-t{turn}") for turn in range(turns)]
+
+    started_at = time.perf_counter()
+    sessions = await asyncio.gather(*(session(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    results = [turn for turns_of_session in sessions for turn in turns_of_session]
+    walls = [result["wall"] for result in results]
+    overheads = [result["overhead"] for result in results]
+    step_gaps = [gap for result in results for gap in result["step_gaps"]]
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "turns": len(results),
+        "throughput_turns_per_s": len(results) / elapsed,
+        "wall_p50_ms": percentile(walls, 0.5) * 1000,
+        "wall_p95_ms": percentile(walls, 0.95) * 1000,
+        "overhead_p50_ms": percentile(overheads, 0.5) * 1000,
+        "overhead_p95_ms": percentile(overheads, 0.95) * 1000,
+        "steps_per_turn": statistics.mean(result["steps"] for result in results),
+        "step_gap_p50_ms": percentile(step_gaps, 0.5) * 1000,
+        "step_gap_p95_ms": percentile(step_gaps, 0.95) * 1000,
+    }
+
+
+async def run_long_conversation(mock_url: str, run_turn, target: str, turns: int) -> dict:
+    """Runs one long conversation, tracking Python heap growth while the history grows."""
+    session_id = f"{target}-long"
+    tracemalloc.start()
+    try:
+        heap_sizes = []
+        overheads = []
+        for turn in range(turns):
+            result = await timed_turn(mock_url, run_turn, session_id, f"{session_id}-t{turn}")
+            overheads.append(result["overhead"])
+            heap_sizes.append(tracemalloc.get_traced_memory()[0])
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "target": target,
+        "turns": turns,
+        "heap_first_turn_kib": heap_sizes[0] / 1024,
+        "heap_last_turn_kib": heap_sizes[-1] / 1024,
+        "heap_growth_per_turn_kib": (heap_sizes[-1] - heap_sizes[0]) / max(turns - 1, 1) / 1024,
+        "overhead_first_turn_ms": overheads[0] * 1000,
+        "overhead_last_turn_ms": overheads[-1] * 1000,
+        "max_rss_mib": max_rss_mib(),
+    }
+
+
+def print_report(console: Console, levels: List[dict], long_runs: List[dict]) -> None:
+    table = Table(title="Framework overhead per turn (mock model time excluded)")
+    for column in ["target", "concurrency", "turns", "turns/s", "wall p50/p95 ms", "overhead p50/p95 ms",
+                   "steps/turn", "step gap p50/p95 ms"]:
+        table.add_column(column)
+    for level in levels:
+        table.add_row(
+            level["target"], str(level["concurrency"]), str(level["turns"]),
+            f"{level['throughput_turns_per_s']:.2f}",
+            f"{level['wall_p50_ms']:.0f} / {level['wall_p95_ms']:.0f}",
+            f"{level['overhead_p50_ms']:.0f} / {level['overhead_p95_ms']:.0f}",
+            f"{level['steps_per_turn']:.1f}",
+            f"{level['step_gap_p50_ms']:.0f} / {level['step_gap_p95_ms']:.0f}",
+        )
+    console.print(table)
+    if not long_runs:
+        return
+
+    table = Table(title="Long conversation memory growth")
+    for column in ["target", "turns", "heap first/last KiB", "heap growth/turn KiB", "overhead first/last ms",
+                   "max RSS MiB"]:
+        table.add_column(column)
+    for run in long_runs:
+        table.add_row(
+            run["target"], str(run["turns"]),
+            f"{run['heap_first_turn_kib']:.0f} / {run['heap_last_turn_kib']:.0f}",
+            f"{run['heap_growth_per_turn_kib']:.1f}",
+            f"{run['overhead_first_turn_ms']:.0f} / {run['overhead_last_turn_ms']:.0f}",
+            f"{run['max_rss_mib']:.0f}",
+        )
+    console.print(table)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Load-tests the agents against a local mock LLM, fully offline.")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--turns", type=int, default=3, help="turns per conversation at every concurrency level")
+    parser.add_argument("--long-turns", type=int, default=30, help="turns of the long conversation, 0 to skip")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock seconds before every response")
+    parser.add_argument("--chunk-latency", type=float, default=0.0, help="mock seconds between streamed chunks")
+    parser.add_argument("--stream", action="store_true", help="use streaming chat completions")
+    parser.add_argument("--script", help="JSON file with scripted tool calls, see bench_mock_llm.DEFAULT_SCRIPT")
+    parser.add_argument("--output", help="JSON file for raw results")
+    args = parser.parse_args()
+
+    mock_process, mock_url = await start_mock_process(args)
+
+    console = Console()
+    levels = []
+    long_runs = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            configure_env(f"{mock_url}/v1", work_dir)
+            for target in args.targets:
+                console.print(f"[blue]benchmarking {target}...")
+                # agents print their progress, keep the report readable
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    async with DRIVERS[target](args.stream) as run_turn:
+                        for concurrency in args.concurrency:
+                            levels.append(await run_level(mock_url, run_turn, target, concurrency, args.turns))
+                        if args.long_turns > 0:
+                            long_runs.append(
+                                await run_long_conversation(mock_url, run_turn, target, args.long_turns)
+                            )
+    finally:
+        mock_process.terminate()
+        await mock_process.wait()
+
+    print_report(console, levels, long_runs)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"levels": levels, "long_conversations": long_runs}, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,214 @@
+import re
+import json
+import time
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# Scripted tool calls: on every request the first entry offered in `tools` and not called yet
+# since the last user message is returned as a tool call, otherwise the mock answers with text.
+# '{tag}' in arguments is replaced with the benchmark tag of the conversation, so sub-agent calls can be attributed.
+DEFAULT_SCRIPT = [
+    {"tool": "read_note", "arguments": {"zk_note_name": "0a context"}},
+    {"tool": "consult_analyst", "arguments": {"query": "[bench:{tag}] what are the facts"}},
+    {"tool": "consult_strategist", "arguments": {"query": "[bench:{tag}] why does it matter"}},
+    {"tool": "consult_critic", "arguments": {"query": "[bench:{tag}] what could go wrong"}},
+]
+
+BENCH_TAG = re.compile(r"\[bench:([^\]]+)\]")
+
+
+def _content_to_text(content) -> str:
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+class MockLLM:
+    """
+    Deterministic stand-in for an OpenAI-compatible chat completions API.
+
+    Every response waits `latency` seconds, streamed responses additionally wait `chunk_latency` per chunk.
+    Start and end of every request are recorded per benchmark tag, see `requests_for` and GET /stats?tag=...
+    Timestamps are wall clock `time.time()`, so they can be compared with the benchmark process.
+    """
+
+    def __init__(self, script: List[dict], latency: float, chunk_latency: float, answer_words: int):
+        self.script = script
+        self.latency = latency
+        self.chunk_latency = chunk_latency
+        self.answer_words = answer_words
+        self._lock = threading.Lock()
+        self._requests = defaultdict(list)
+        self._counter = 0
+
+    def requests_for(self, tag: str) -> List[tuple]:
+        """Returns (started_at, finished_at) time.time() pairs of all requests made for the given tag."""
+        with self._lock:
+            return list(self._requests[tag])
+
+    def record(self, tag: str, started_at: float, finished_at: float) -> None:
+        with self._lock:
+            self._requests[tag].append((started_at, finished_at))
+
+    def next_id(self) -> str:
+        with self._lock:
+            self._counter += 1
+            return f"chatcmpl-mock-{self._counter}"
+
+    def plan(self, body: dict) -> tuple:
+        """Returns (tag, tool call or None, answer text) for a chat completions request body."""
+        messages = body.get("messages", [])
+        last_user_index = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        user_text = _content_to_text(messages[last_user_index].get("content")) if last_user_index >= 0 else ""
+        tag_match = BENCH_TAG.search(user_text)
+        tag = tag_match.group(1) if tag_match else ""
+
+        called = set()
+        for message in messages[last_user_index + 1:]:
+            for tool_call in message.get("tool_calls") or []:
+                called.add(tool_call["function"]["name"])
+
+        offered = {tool["function"]["name"] for tool in body.get("tools") or []}
+        for step in self.script:
+            if step["tool"] in offered and step["tool"] not in called:
+                arguments = json.dumps(step["arguments"]).replace("{tag}", tag)
+                return tag, {"name": step["tool"], "arguments": arguments}, ""
+
+        words = BENCH_TAG.sub("", user_text).split() or ["ok"]
+        answer = " ".join(words[i % len(words)] for i in range(self.answer_words))
+        return tag, None, f"Mock answer: {answer}"
+
+
+def _usage(body: dict, answer: str) -> dict:
+    prompt_chars = sum(len(_content_to_text(m.get("content"))) for m in body.get("messages", []))
+    prompt_tokens = prompt_chars // 4 + 1
+    completion_tokens = len(answer.split()) + 1
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def make_handler(mock: MockLLM):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path.rstrip("/") == "/stats":
+                tag = parse_qs(url.query).get("tag", [""])[0]
+                self._send_json({"tag": tag, "requests": mock.requests_for(tag)})
+            elif url.path.rstrip("/").endswith("/models"):
+                self._send_json({"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+
+            started_at = time.time()
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            tag, tool_call, answer = mock.plan(body)
+            time.sleep(mock.latency)
+
+            if body.get("stream"):
+                self._stream(body, tool_call, answer)
+            else:
+                self._complete(body, tool_call, answer)
+            mock.record(tag, started_at, time.time())
+
+        def _base(self, body: dict, object_type: str) -> dict:
+            return {
+                "id": mock.next_id(),
+                "object": object_type,
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+            }
+
+        def _complete(self, body: dict, tool_call: Optional[dict], answer: str):
+            message = {"role": "assistant", "content": answer or None}
+            if tool_call:
+                message["tool_calls"] = [{"id": f"call_{mock.next_id()}", "type": "function", "function": tool_call}]
+            response = self._base(body, "chat.completion")
+            response["choices"] = [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if tool_call else "stop",
+            }]
+            response["usage"] = _usage(body, answer)
+            self._send_json(response)
+
+        def _stream(self, body: dict, tool_call: Optional[dict], answer: str):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+
+            base = self._base(body, "chat.completion.chunk")
+            if tool_call:
+                deltas = [{"role": "assistant", "tool_calls": [{
+                    "index": 0, "id": f"call_{mock.next_id()}", "type": "function", "function": tool_call,
+                }]}]
+            else:
+                deltas = [{"role": "assistant", "content": ""}]
+                deltas += [{"content": word + " "} for word in answer.split()]
+
+            for delta in deltas:
+                self._send_chunk({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+                time.sleep(mock.chunk_latency)
+            finish_reason = "tool_calls" if tool_call else "stop"
+            self._send_chunk({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            if (body.get("stream_options") or {}).get("include_usage"):
+                self._send_chunk({**base, "choices": [], "usage": _usage(body, answer)})
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _send_chunk(self, chunk: dict):
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        def _send_json(self, payload: dict):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def start_mock_server(mock: MockLLM, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Starts the mock in a daemon thread, port 0 picks a free one. Base url is http://host:port/v1"""
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deterministic mock of OpenAI-compatible chat completions API.")
+    parser.add_argument("--port", type=int, default=1234, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds before every response")
+    parser.add_argument("--chunk-latency", type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument("--answer-words", type=int, default=32)
+    parser.add_argument("--script", help="JSON file with scripted tool calls, see DEFAULT_SCRIPT")
+    args = parser.parse_args()
+
+    script = DEFAULT_SCRIPT
+    if args.script:
+        with open(args.script, "r") as file:
+            script = json.load(file)
+    mock_server = start_mock_server(MockLLM(script, args.latency, args.chunk_latency, args.answer_words),
+                                    port=args.port)
+    # bench_agents.py reads the url from this line
+    print(f"mock LLM listening on http://127.0.0.1:{mock_server.server_port}/v1", flush=True)
+    threading.Event().wait()
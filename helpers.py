@@ -1,4 +1,6 @@
+import hashlib
 import os
+from typing import Optional
 
 
 def _get_notes_folder_path():
@@ -12,10 +14,32 @@ def _get_notes_folder_path():
     return path
 
 
+def _get_mcp_server_env() -> Optional[dict]:
+    """
+    Environment for MCP servers spawned over stdio. MCP passes only a safe default set of variables,
+    so the client's NOTES_PATH and FASTMCP_LOG_LEVEL are forwarded explicitly,
+    otherwise the server falls back to its own .env.
+    """
+    env = {name: os.environ[name] for name in ("NOTES_PATH", "FASTMCP_LOG_LEVEL") if os.getenv(name)}
+    return env or None
+
+
 def _get_note_path(note_name: str):
     return f"{_get_notes_folder_path()}/{note_name}.md"
 
 
+def _get_notes_corpus_version() -> str:
+    """Returns a version stamp of the notes corpus: a hash of note names and their modification times."""
+    folder = _get_notes_folder_path()
+    notes = []
+    for root, _, files in os.walk(folder):
+        for file_name in files:
+            if file_name.endswith(".md"):
+                file_path = os.path.join(root, file_name)
+                notes.append(f"{os.path.relpath(file_path, folder)}:{os.stat(file_path).st_mtime_ns}")
+    return hashlib.sha256("\n".join(sorted(notes)).encode("utf-8")).hexdigest()
+
+
 def _read_text_file(file_path: str) -> str:
     with open(file_path, "r") as file:
         return file.read()
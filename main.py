@@ -11,10 +11,13 @@ from langchain_community.tools import FileSearchTool, ReadFileTool, HumanInputRu
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from dotenv import load_dotenv
 import os
+import time
 import asyncio
 from rich.panel import Panel
 from rich.console import Console
 
+from helpers import _get_mcp_server_env
+from model_router import ModelRouter
 from reminders import add_reminder
 
 mcp_client = MultiServerMCPClient(
@@ -29,6 +32,7 @@ mcp_client = MultiServerMCPClient(
                 "mcp_server.py"
             ],
             "transport": "stdio",
+            "env": _get_mcp_server_env(),
         }
         # "r-notes-http": {
         #     # make sure you start mcp server on port 8000 using `uv run mcp_server.py`
@@ -39,17 +43,21 @@ mcp_client = MultiServerMCPClient(
 )
 
 
-async def main():
+async def build_agent(streaming: bool = False):
+    """Builds one react agent executor per router tier, all sharing a single checkpointer."""
     load_dotenv()
-    # main logic
-    llm_model = os.getenv("LLM_MODEL", "gpt-oss:120b")
-    llm_base_url = os.getenv("LLM_BASE_URL", "http://localhost:1234/v1")
+    # small models serve simple turns, large ones the hard turns, see LLM_MODELS
+    model_router = ModelRouter.from_env()
     llm_temperature = float(os.getenv("LLM_TEMPERATURE", "1"))
-    model = ChatOpenAI(
-        model=llm_model,
-        temperature=llm_temperature,
-        base_url=llm_base_url,
-    )
+    models = {
+        tier: ChatOpenAI(
+            model=tier.model_name,
+            temperature=llm_temperature,
+            base_url=tier.base_url,
+            streaming=streaming,
+        )
+        for tier in model_router.tiers
+    }
     # search = DuckDuckGoSearchRun()
     memory = MemorySaver()
     mcp_tools = await mcp_client.get_tools()
@@ -71,7 +79,63 @@ async def main():
                 "Before you answer, assess the uncertainty of your response. If it's greater than 0.1, ask me clarifying questions until the uncertainty is 0.1 or lower." \
                 "Be succinct in thinking process.")
 
-    agent_executor = create_react_agent(model, tools, prompt=system_message, checkpointer=memory)
+    # executors share the checkpointer, so a conversation continues across tiers
+    agent_executors = {
+        tier: create_react_agent(model, tools, prompt=system_message, checkpointer=memory)
+        for tier, model in models.items()
+    }
+    return model_router, agent_executors
+
+
+async def run_turn(model_router: ModelRouter, agent_executors: dict, user_message: str, config: dict,
+                   console: Console) -> str:
+    """Runs a single user turn on a routed executor, escalating on low confidence. Returns the final answer."""
+    input_to_model = {"messages": [HumanMessage(content=f"{user_message}")]}
+    ## direct invoke
+    # response = agent_executor.invoke(input_to_model, config=config)
+    # response_messages = response["messages"]
+    # for message in response_messages:
+    #     message.pretty_print()
+
+    ## streaming
+    tier = model_router.route(user_message, "agent")
+    state_before_turn = await agent_executors[tier].aget_state(config)
+    history_length = len(state_before_turn.values.get("messages", []))
+    run_config = config
+    while tier is not None:
+        answer = ""
+        async for step in agent_executors[tier].astream(
+                input_to_model,
+                run_config,
+                stream_mode="values",
+        ):
+            last_message = step["messages"][-1]
+            if last_message.type == "ai":
+                last_message.pretty_print()
+                answer = last_message.content
+
+        state = await agent_executors[tier].aget_state(config)
+        new_messages = state.values["messages"][history_length:]
+        called_tools = [
+            tool_call["name"] for message in new_messages if message.type == "ai" for tool_call in message.tool_calls
+        ]
+        next_tier = model_router.escalate(tier, str(answer), called_tools)
+        if next_tier is not None:
+            # roll back the rejected attempt, so the larger model answers on a clean thread:
+            # fork from the checkpoint before the turn, or drop the thread if it was empty
+            checkpoint_id = state_before_turn.config["configurable"].get("checkpoint_id")
+            if checkpoint_id:
+                run_config = {**config, "configurable": {**config["configurable"], "checkpoint_id": checkpoint_id}}
+            else:
+                await agent_executors[tier].checkpointer.adelete_thread(config["configurable"]["thread_id"])
+            console.print(f"[blue]low confidence from {tier.model_name}, escalating to {next_tier.model_name}")
+        tier = next_tier
+    return str(answer)
+
+
+async def main():
+    # main logic
+    model_router, agent_executors = await build_agent()
     thread_id = os.getenv("AGENT_THREAD_ID", "some thread id")
     recursion_limit = int(os.getenv("AGENT_RECURSION_LIMIT", "42"))
     config = {"configurable": {"thread_id": thread_id, "recursion_limit": recursion_limit}}
@@ -83,22 +147,9 @@ async def main():
         user_message = input(">> ").strip()
         console.print(Panel(user_message, title="Input", title_align="left"))
 
-        input_to_model = {"messages": [HumanMessage(content=f"{user_message}")]}
-        ## direct invoke
-        # response = agent_executor.invoke(input_to_model, config=config)
-        # response_messages = response["messages"]
-        # for message in response_messages:
-        #     message.pretty_print()
-
-        ## streaming
-        async for step in agent_executor.astream(
-                input_to_model,
-                config,
-                stream_mode="values",
-        ):
-            last_message = step["messages"][-1]
-            if last_message.type == "ai":
-                last_message.pretty_print()
+        started_at = time.perf_counter()
+        await run_turn(model_router, agent_executors, user_message, config, console)
+        console.print(f"[blue]turn took {time.perf_counter() - started_at:.1f}s")
 
     ## template example
     # template_prompt = ChatPromptTemplate.from_messages([
@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextlib
+from typing import List, TextIO
+
+from dotenv import load_dotenv
+
+
+def read_queries(source: TextIO) -> List[dict]:
+    """
+    Reads queries from JSONL, one per line: {"id": "...", "query": "..."}.
+    Id is optional and defaults to the line number.
+    """
+    queries = []
+    for line_number, line in enumerate(source, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number} is not valid JSON: {e.msg}: {line}") from e
+        if "query" not in entry:
+            raise ValueError(f"Line {line_number} has no 'query' field: {line}")
+        queries.append({"id": entry.get("id", line_number), "query": entry["query"]})
+    return queries
+
+
+def usage_to_dict(usage) -> dict:
+    return {
+        "requests": usage.requests,
+        "request_tokens": usage.request_tokens,
+        "response_tokens": usage.response_tokens,
+        "total_tokens": usage.total_tokens,
+    }
+
+
+async def build_runner(agent_kind: str):
+    """
+    Returns a context manager keeping MCP servers up for the whole batch, and a coroutine running one query.
+    Every query runs without message history, so queries are isolated from each other.
+    """
+    if agent_kind == "moe":
+        import main_pydantic_moe as moe
+
+        async def run_query(query: str):
+            tier = moe.model_router.route(query, "facilitator")
+            result, _ = await moe.run_routed(moe.orchestrator_agent, query, tier)
+            return result
+
+        return moe.analyst_agent.run_mcp_servers(), run_query
+
+    from main_pydantic import build_agent
+
+    agent = await build_agent()
+
+    async def run_query(query: str):
+        return await agent.run(query)
+
+    return agent.run_mcp_servers(), run_query
+
+
+async def run_batch(queries: List[dict], run_query, concurrency: int, output: TextIO) -> None:
+    """Runs queries on a bounded pool of workers, writing each result as soon as it completes."""
+    queue = asyncio.Queue()
+    for entry in queries:
+        queue.put_nowait(entry)
+
+    async def worker():
+        while not queue.empty():
+            entry = queue.get_nowait()
+            record = {"id": entry["id"], "query": entry["query"]}
+            started_at = time.perf_counter()
+            try:
+                result = await run_query(entry["query"])
+                record["output"] = str(result.output)
+                record["usage"] = usage_to_dict(result.usage())
+            except Exception as e:
+                record["error"] = str(e)
+            record["elapsed_seconds"] = round(time.perf_counter() - started_at, 3)
+
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, len(queries)))))
+
+
+async def main() -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Runs many queries through the agent concurrently.")
+    parser.add_argument("--agent", choices=["pydantic", "moe"], default="pydantic",
+                        help="main_pydantic.py agent or main_pydantic_moe.py orchestrator")
+    parser.add_argument("--input", default="-", help="JSONL file with queries, '-' for stdin")
+    parser.add_argument("--output", default="-", help="JSONL file for results, '-' for stdout")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "4")))
+    args = parser.parse_args()
+
+    with contextlib.ExitStack() as stack:
+        source = sys.stdin if args.input == "-" else stack.enter_context(open(args.input, "r"))
+        output = sys.stdout if args.output == "-" else stack.enter_context(open(args.output, "w"))
+        queries = read_queries(source)
+
+        # agents print progress to stdout, keep it away from JSONL results
+        stack.enter_context(contextlib.redirect_stdout(sys.stderr))
+
+        mcp_servers, run_query = await build_runner(args.agent)
+        started_at = time.perf_counter()
+        async with mcp_servers:
+            await run_batch(queries, run_query, max(args.concurrency, 1), output)
+        elapsed = time.perf_counter() - started_at
+
+    print(f"{len(queries)} queries done in {elapsed:.1f}s with concurrency {args.concurrency}", file=sys.stderr)
+    if args.agent == "moe":
+        import main_pydantic_moe as moe
+
+        stats = moe.expert_cache.stats()
+        print(f"Expert cache: {stats['hits']} hits, {stats['misses']} misses, {stats['bypasses']} bypasses "
+              f"(hit rate {stats['hit_rate']:.0%})", file=sys.stderr)
+        moe.expert_cache.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
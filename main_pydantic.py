@@ -10,6 +10,8 @@ from pydantic_ai.models.openai import OpenAIModel, OpenAIModelSettings
 from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic_ai.mcp import MCPServerStdio, MCPServerSSE
 
+from helpers import _get_mcp_server_env
+
 
 async def build_agent() -> Agent:
     """Build a simple Pydantic-AI agent with MCP tools dynamically attached."""
@@ -40,6 +42,7 @@ async def build_agent() -> Agent:
         args=[
             "--directory", "./", "run", "mcp_server.py",
         ],
+        env=_get_mcp_server_env(),
     )
 
     agent = Agent(
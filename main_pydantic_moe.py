@@ -1,6 +1,9 @@
 import os
+import time
 import asyncio
-from typing import List, Optional
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, List, Optional
 
 from dotenv import load_dotenv
 from rich.console import Console
@@ -10,66 +13,83 @@ from pydantic_ai import Agent, RunContext
 from pydantic_ai.models.openai import OpenAIModel, OpenAIModelSettings
 from pydantic_ai.providers.openai import OpenAIProvider
 from pydantic_ai.mcp import MCPServerStdio
+from pydantic_ai.messages import ModelResponse, ToolCallPart
+from pydantic_ai.usage import Usage
+
+from helpers import _get_mcp_server_env, _get_notes_corpus_version
+from model_router import ModelRouter, ModelTier, has_side_effects
+from response_cache import ResponseCache
 
 # --- Configuration & Model Setup ---
+load_dotenv()
+
+# Small models serve simple turns, large ones the hard turns, see LLM_MODELS.
+model_router = ModelRouter.from_env()
 
-def get_model() -> OpenAIModel:
-    """Helper to initialize the model based on environment variables."""
-    load_dotenv()
-    llm_model = os.getenv("LLM_MODEL", "gpt-oss:120b")
-    llm_base_url = os.getenv("LLM_BASE_URL", "http://localhost:1234/v1")
+@lru_cache(maxsize=None)
+def get_model(tier: Optional[ModelTier] = None) -> OpenAIModel:
+    """Helper to initialize the model for a router tier, the largest one by default."""
+    tier = tier or model_router.largest
     api_key = os.getenv("OPENAI_API_KEY", "sk-no-key-required-for-local")
     
     return OpenAIModel(
-        model_name=llm_model,
-        provider=OpenAIProvider(api_key=api_key, base_url=llm_base_url),
+        model_name=tier.model_name,
+        provider=OpenAIProvider(api_key=api_key, base_url=tier.base_url),
     )
 
 def get_model_settings() -> OpenAIModelSettings:
     llm_temperature = float(os.getenv("LLM_TEMPERATURE", "1"))
     return OpenAIModelSettings(temperature=llm_temperature)
 
+# --- Expert response cache ---
+# Facilitator often re-asks an expert the same query, so expert answers are cached on disk.
+expert_cache = ResponseCache.from_env()
+
 # --- MCP Setup (For knowledge access by the Analyst) ---
 mcp_server = MCPServerStdio(
     command="uv",
     args=["--directory", "./", "run", "mcp_server.py"],
+    env=_get_mcp_server_env(),
 )
 
 # --- Expert 1: The Analyst ---
 # Focuses on facts, data, and using tools to find information.
+ANALYST_SYSTEM_PROMPT = (
+    "You are the Analyst. Your role is to provide factual, data-driven insights. "
+    "Use your tools to search through notes if needed. Focus on 'what' and 'how'. "
+    "Be precise, objective, and highlight key facts."
+)
 analyst_agent = Agent(
     model=get_model(),
     model_settings=get_model_settings(),
     mcp_servers=[mcp_server],
-    system_prompt=(
-        "You are the Analyst. Your role is to provide factual, data-driven insights. "
-        "Use your tools to search through notes if needed. Focus on 'what' and 'how'. "
-        "Be precise, objective, and highlight key facts."
-    ),
+    system_prompt=ANALYST_SYSTEM_PROMPT,
 )
 
 # --- Expert 2: The Strategist ---
 # Focuses on high-level goals, "why", and broader implications.
+STRATEGIST_SYSTEM_PROMPT = (
+    "You are the Strategist. Your role is to look at the big picture and long-term goals. "
+    "Focus on 'why' and the overall value. Think about connections between different ideas "
+    "and how they fit into a larger strategy."
+)
 strategist_agent = Agent(
     model=get_model(),
     model_settings=get_model_settings(),
-    system_prompt=(
-        "You are the Strategist. Your role is to look at the big picture and long-term goals. "
-        "Focus on 'why' and the overall value. Think about connections between different ideas "
-        "and how they fit into a larger strategy."
-    ),
+    system_prompt=STRATEGIST_SYSTEM_PROMPT,
 )
 
 # --- Expert 3: The Critic ---
 # Focuses on risks, flaws, edge cases, and skepticism.
+CRITIC_SYSTEM_PROMPT = (
+    "You are the Critic. Your role is to find potential flaws, risks, or edge cases "
+    "in the proposed solutions or ideas. Be skeptical but constructive. "
+    "What are we missing? What could go wrong? What are the hidden assumptions?"
+)
 critic_agent = Agent(
     model=get_model(),
     model_settings=get_model_settings(),
-    system_prompt=(
-        "You are the Critic. Your role is to find potential flaws, risks, or edge cases "
-        "in the proposed solutions or ideas. Be skeptical but constructive. "
-        "What are we missing? What could go wrong? What are the hidden assumptions?"
-    ),
+    system_prompt=CRITIC_SYSTEM_PROMPT,
 )
 
 # --- Orchestrator: The Facilitator ---
@@ -91,26 +111,102 @@ orchestrator_agent = Agent(
     ),
 )
 
+# Tools called by the current run, including nested expert runs, see run_routed.
+called_tools_var: ContextVar[Optional[set]] = ContextVar("called_tools", default=None)
+
+async def run_routed(agent: Agent, prompt: str, tier: ModelTier, usage: Optional[Usage] = None, **kwargs):
+    """
+    Runs an agent on the given model tier, escalating to larger tiers while the answer looks low confidence.
+    Runs which called side effect tools, directly or through an expert consult, are never escalated.
+    Returns the result and the names of tools called by the accepted attempt, including nested ones.
+    All attempts share one usage, so tokens of rejected attempts are still counted in result.usage().
+    """
+    usage = usage if usage is not None else Usage()
+    parent_called_tools = called_tools_var.get()
+    while True:
+        called_tools = set()
+        token = called_tools_var.set(called_tools)
+        try:
+            result = await agent.run(prompt, model=get_model(tier), usage=usage, **kwargs)
+        finally:
+            called_tools_var.reset(token)
+        called_tools.update(
+            part.tool_name
+            for message in result.new_messages() if isinstance(message, ModelResponse)
+            for part in message.parts if isinstance(part, ToolCallPart)
+        )
+        if parent_called_tools is not None:
+            parent_called_tools.update(called_tools)
+
+        next_tier = model_router.escalate(tier, str(result.output), called_tools)
+        if next_tier is None:
+            return result, called_tools
+        print(f"    (low confidence from {tier.model_name}, escalating to {next_tier.model_name})")
+        tier = next_tier
+
+async def run_expert(agent: Agent, role: str, system_prompt: str, query: str,
+                     get_corpus_version: Optional[Callable[[], Optional[str]]] = None,
+                     usage: Optional[Usage] = None) -> str:
+    """
+    Runs an expert agent on a query, reusing a cached response when possible.
+    get_corpus_version is only called when the cache is used; it returns None to skip the cache,
+    e.g. when the notes corpus can't be stamped.
+    Expert token usage is added to the given facilitator usage.
+    """
+    tier = model_router.route(query, role)
+    settings = dict(get_model_settings())
+    corpus_version = None
+    if not expert_cache.should_bypass(settings):
+        corpus_version = get_corpus_version() if get_corpus_version else ""
+    if corpus_version is None:
+        result, _ = await run_routed(agent, query, tier, usage=usage)
+        return result.output
+
+    # keyed on the routed tier, an escalated answer is stored too, so repeats skip both generations
+    key = expert_cache.make_key(tier.model_name, system_prompt, settings, query, corpus_version)
+    cached = expert_cache.get(key)
+    if cached is not None:
+        print("    (cached response)")
+        return cached
+
+    result, called_tools = await run_routed(agent, query, tier, usage=usage)
+    # a cache hit would report f.e. "reminder added" without adding it
+    if not has_side_effects(called_tools):
+        expert_cache.put(key, result.output)
+    return result.output
+
+def get_analyst_corpus_version() -> Optional[str]:
+    """
+    Analyst answers depend on notes and permanent memory read via tools,
+    so its cache entries are tied to their versions.
+    """
+    try:
+        notes_version = _get_notes_corpus_version()
+    except (ValueError, OSError):
+        return None
+    # read and written by MCP server relative to the repo, see mcp_server.py
+    memory_path = "permanent_memory.txt"
+    memory_version = os.stat(memory_path).st_mtime_ns if os.path.exists(memory_path) else 0
+    return f"{notes_version}-{memory_version}"
+
 @orchestrator_agent.tool
 async def consult_analyst(ctx: RunContext[None], query: str) -> str:
     """Consult the Analyst for factual data and technical details."""
     print(f"  [Facilitator -> Analyst] Analyzing: '{query}'...")
-    result = await analyst_agent.run(query)
-    return result.output
+    return await run_expert(analyst_agent, "analyst", ANALYST_SYSTEM_PROMPT, query, get_analyst_corpus_version,
+                            usage=ctx.usage)
 
 @orchestrator_agent.tool
 async def consult_strategist(ctx: RunContext[None], query: str) -> str:
     """Consult the Strategist for high-level goals and strategic value."""
     print(f"  [Facilitator -> Strategist] Thinking strategically about: '{query}'...")
-    result = await strategist_agent.run(query)
-    return result.output
+    return await run_expert(strategist_agent, "strategist", STRATEGIST_SYSTEM_PROMPT, query, usage=ctx.usage)
 
 @orchestrator_agent.tool
 async def consult_critic(ctx: RunContext[None], query: str) -> str:
     """Consult the Critic to identify risks, flaws, or missing pieces."""
     print(f"  [Facilitator -> Critic] Reviewing risks for: '{query}'...")
-    result = await critic_agent.run(query)
-    return result.output
+    return await run_expert(critic_agent, "critic", CRITIC_SYSTEM_PROMPT, query, usage=ctx.usage)
 
 # --- Interactive Loop ---
 async def interactive_loop() -> None:
@@ -133,15 +229,27 @@ async def interactive_loop() -> None:
 
         try:
             # The orchestrator handles the request and calls sub-agents as needed
-            result = await orchestrator_agent.run(
+            started_at = time.perf_counter()
+            result, _ = await run_routed(
+                orchestrator_agent,
                 user_message,
+                model_router.route(user_message, "facilitator"),
                 message_history=message_history,
             )
             message_history = result.all_messages()
+            elapsed = time.perf_counter() - started_at
             
-            console.print(Panel(str(result.output), title="MoE Synthesized Response", title_align="left"))
+            console.print(Panel(str(result.output), title=f"MoE Synthesized Response ({elapsed:.1f}s)",
+                                title_align="left"))
         except Exception as e:
             console.print(Panel(f"Error: {e}", title="System Error", title_align="left", border_style="red"))
 
+    stats = expert_cache.stats()
+    console.print(
+        f"Expert cache: {stats['hits']} hits, {stats['misses']} misses, {stats['bypasses']} bypasses "
+        f"(hit rate {stats['hit_rate']:.0%})"
+    )
+    expert_cache.close()
+
 if __name__ == "__main__":
     asyncio.run(interactive_loop())
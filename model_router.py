@@ -0,0 +1,106 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Collection, List, Optional
+
+# Prompts that only ask to fetch something via tools, e.g. "read my context note", are cheap to serve.
+# Writing prompts (add reminder, save, write memory) are never routed to the small model.
+TOOL_ONLY_INTENT = re.compile(
+    r"^(please\s+)?(read|open|show|list|get|find|search|look\s+up)\b",
+    re.IGNORECASE,
+)
+
+# Tools which change something outside the conversation, turns calling them are never rerun.
+SIDE_EFFECT_TOOLS = frozenset({"add_reminder", "write_permanent_agent_memory", "save_to_notes_storage"})
+
+# Phrases signaling that a small model wasn't able to answer properly.
+LOW_CONFIDENCE_MARKERS = (
+    "i'm not sure",
+    "i am not sure",
+    "i don't know",
+    "i do not know",
+    "not certain",
+    "unable to determine",
+    "cannot determine",
+    "can't determine",
+)
+
+
+def has_side_effects(called_tools: Collection[str]) -> bool:
+    return any(tool_name in SIDE_EFFECT_TOOLS for tool_name in called_tools)
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    model_name: str
+    base_url: str
+
+
+def parse_model_tiers(models: str, default_base_url: str) -> List[ModelTier]:
+    """
+    Parses a comma-separated list of models ordered from the smallest to the largest.
+    Every entry can override base url with '@', f.e. "gpt-oss:20b,gpt-oss:120b@http://localhost:11434/v1"
+    """
+    tiers = []
+    for entry in models.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        model_name, _, base_url = entry.partition("@")
+        tiers.append(ModelTier(model_name=model_name.strip(), base_url=base_url.strip() or default_base_url))
+    return tiers
+
+
+class ModelRouter:
+    """
+    Routes each LLM call to the smallest model tier able to handle it.
+
+    Tool-only prompts go to the smallest tier, long prompts and reasoning-heavy roles go to the largest one.
+    A low confidence answer is escalated to the next tier, unless the turn already called a side effect tool.
+    """
+
+    def __init__(self, tiers: List[ModelTier], max_small_prompt_chars: int, large_roles: List[str],
+                 min_confident_chars: int):
+        if not tiers:
+            raise ValueError("Model router needs at least one model")
+        self.tiers = tiers
+        self.max_small_prompt_chars = max_small_prompt_chars
+        self.large_roles = large_roles
+        self.min_confident_chars = min_confident_chars
+
+    @classmethod
+    def from_env(cls) -> "ModelRouter":
+        llm_model = os.getenv("LLM_MODEL", "gpt-oss:120b")
+        llm_base_url = os.getenv("LLM_BASE_URL", "http://localhost:1234/v1")
+        large_roles = os.getenv("LLM_ROUTER_LARGE_ROLES", "strategist,critic")
+        return cls(
+            tiers=parse_model_tiers(os.getenv("LLM_MODELS", llm_model), llm_base_url),
+            max_small_prompt_chars=int(os.getenv("LLM_ROUTER_MAX_SMALL_PROMPT_CHARS", "200")),
+            large_roles=[role.strip() for role in large_roles.split(",") if role.strip()],
+            min_confident_chars=int(os.getenv("LLM_ROUTER_MIN_CONFIDENT_CHARS", "20")),
+        )
+
+    @property
+    def largest(self) -> ModelTier:
+        return self.tiers[-1]
+
+    def route(self, prompt: str, role: str) -> ModelTier:
+        if role in self.large_roles or len(prompt) > self.max_small_prompt_chars:
+            return self.largest
+        if TOOL_ONLY_INTENT.match(prompt.strip()):
+            return self.tiers[0]
+        return self.largest
+
+    def escalate(self, tier: ModelTier, output: str, called_tools: Collection[str]) -> Optional[ModelTier]:
+        """
+        Returns the next larger tier if the output looks low confidence, None if it should be kept.
+        Turns which called side effect tools are always kept, as rerunning them would replay f.e. saving notes.
+        """
+        index = self.tiers.index(tier)
+        if has_side_effects(called_tools) or index == len(self.tiers) - 1:
+            return None
+
+        text = output.strip().lower()
+        if len(text) < self.min_confident_chars or any(marker in text for marker in LOW_CONFIDENCE_MARKERS):
+            return self.tiers[index + 1]
+        return None
@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Optional
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases, collapses whitespace and drops trailing punctuation, so near-identical queries share a key."""
+    normalized = re.sub(r"\s+", " ", query.strip().lower())
+    return normalized.rstrip(" .!?")
+
+
+class ResponseCache:
+    """
+    On-disk exact-match cache for LLM responses, backed by sqlite.
+
+    Entries are keyed on (model, system prompt, settings, normalized query, corpus version),
+    expire after `ttl_seconds` and the least recently used ones are evicted above `max_entries`.
+    Calls with temperature above `max_temperature` are not cached at all.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float, max_entries: int, max_temperature: float):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_temperature = max_temperature
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+        self._connection = sqlite3.connect(path)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            path=os.getenv("RESPONSE_CACHE_PATH", ".response_cache.sqlite"),
+            ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400")),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "500")),
+            # only deterministic calls are cached by default, sampled answers shouldn't be replayed
+            max_temperature=float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0")),
+        )
+
+    def should_bypass(self, settings: dict) -> bool:
+        """Returns True (and counts a bypass) when sampling is too random for a cached answer to be reused."""
+        temperature = settings.get("temperature")
+        if temperature is not None and temperature > self.max_temperature:
+            self.bypasses += 1
+            return True
+        return False
+
+    @staticmethod
+    def make_key(model_name: str, system_prompt: str, settings: dict, query: str, corpus_version: str = "") -> str:
+        payload = json.dumps(
+            [model_name, system_prompt, settings, normalize_query(query), corpus_version],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        row = self._connection.execute(
+            "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or now - row[1] > self.ttl_seconds:
+            self.misses += 1
+            return None
+
+        self._connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        self._connection.commit()
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        self._connection.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            (key, response, now, now),
+        )
+        self._evict(now)
+        self._connection.commit()
+
+    def _evict(self, now: float) -> None:
+        self._connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._connection.execute(
+            "DELETE FROM responses WHERE key NOT IN "
+            "(SELECT key FROM responses ORDER BY accessed_at DESC LIMIT ?)",
+            (self.max_entries,),
+        )
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        self._connection.close()